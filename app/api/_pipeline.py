@@ -0,0 +1,151 @@
+# app/api/_pipeline.py
+"""
+Per-request preprocessing shared by /chat and /chat/stream.
+
+Both endpoints classify the same message the same way (scope, language,
+URL/step/link hints, password question, follow-up, session key); do that
+once in preprocess() and let the routers branch on the result. The rule
+match is the expensive part, so it is only computed when asked for.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+import asyncio
+import re
+
+from fastapi import Request
+
+from app.engine.password_strength import is_password_question
+from app.models import ChatRequest
+from app.api.helpers import (
+    match_rules, detect_language, is_followup, check_scope, sess_key, SESS, Session,
+    CACHE_MAX_LEN,
+)
+
+# ---- URL pattern for quick safety checks (the url group of HINT_RE) ----
+URL_PAT = r"\b(?:https?://|http://|www\.)[^\s<>'\"()]+"
+
+# Heuristics: if a user is asking for “steps/procedure”, we trigger a flow.
+STEP_HINTS_EN = ("how to", "steps", "procedure", "process", "what next", "next step", "guide", "instructions")
+STEP_HINTS_MY = ("ဘယ်လိုလုပ်", "အဆင့်", "လုပ်နည်း", "လမ်းညွှန်", "စနစ်", "နောက်အဆင့်")
+
+# ---- One-pass keyword classifier ----
+# Every hint word (and any URL) maps to a category bit; a single scan over the
+# lowercased message ORs the bits together so the routers can branch on them.
+HINT_STEP_EN = 1 << 0
+HINT_STEP_MY = 1 << 1
+HINT_LINK_EN = 1 << 2
+HINT_SAFE_EN = 1 << 3
+HINT_LINK_MY = 1 << 4
+HINT_SAFE_MY = 1 << 5
+HINT_URL = 1 << 6
+
+_HINT_WORDS = {
+    HINT_STEP_EN: STEP_HINTS_EN,
+    HINT_STEP_MY: STEP_HINTS_MY,
+    HINT_LINK_EN: ("link",),
+    HINT_SAFE_EN: ("safe",),
+    HINT_LINK_MY: ("လင့်",),
+    HINT_SAFE_MY: ("အန္တရာယ်", "လုံခြုံ"),
+}
+_HINT_BIT = {w: bit for bit, words in _HINT_WORDS.items() for w in words}
+# longest first so overlapping hints resolve to the longer word
+HINT_RE = re.compile(
+    "(?P<url>" + URL_PAT + ")|"
+    + "|".join(map(re.escape, sorted(_HINT_BIT, key=len, reverse=True)))
+)
+
+def classify(lower_msg: str) -> int:
+    bits = 0
+    for mt in HINT_RE.finditer(lower_msg or ""):
+        bits |= HINT_URL if mt.lastgroup == "url" else _HINT_BIT[mt.group(0)]
+    return bits
+
+def _has(bits: int, *flags: int) -> bool:
+    return all(bits & f for f in flags)
+
+def steps_hinted(hints: int, lang: str) -> bool:
+    return _has(hints, HINT_STEP_MY if lang == "my" else HINT_STEP_EN)
+
+def is_link_check(hints: int) -> bool:
+    return (
+        _has(hints, HINT_URL)
+        or _has(hints, HINT_LINK_EN, HINT_SAFE_EN)
+        or _has(hints, HINT_LINK_MY, HINT_SAFE_MY)
+    )
+
+# Follow-ups this short ("done", "next step") continue the current flow
+# without re-running the rule matcher.
+FOLLOWUP_MAX_WORDS = 3
+
+def match_for(msg: str, lang: str, sess: Session, is_fup: bool) -> Dict[str, Any]:
+    last = sess.last_match
+    if (
+        is_fup and last and last.get("flow") and last.get("intent") == sess.topic
+        and len(msg.split()) <= FOLLOWUP_MAX_WORDS
+    ):
+        return last
+    m = match_rules(msg, lang)
+    sess.last_match = m
+    return m
+
+# ---- Preprocessing ----
+@dataclass(slots=True)
+class Preproc:
+    message: str
+    lower: str
+    hints: int
+    in_scope: bool
+    lang_gate: str
+    scope_reason: str
+    scope_tag: str
+    lang: str
+    is_pw_q: bool
+    is_fup: bool
+    key: str
+    _match: Optional[Dict[str, Any]] = None
+
+    @property
+    def is_link_check(self) -> bool:
+        return is_link_check(self.hints)
+
+    @property
+    def wants_steps(self) -> bool:
+        return steps_hinted(self.hints, self.lang)
+
+    @property
+    def sess(self) -> Session:
+        return SESS[self.key]
+
+    def rule_match(self) -> Dict[str, Any]:
+        if self._match is None:
+            self._match = match_for(self.message, self.lang, self.sess, self.is_fup)
+        return self._match
+
+async def preprocess(req: ChatRequest, request: Request) -> Preproc:
+    msg = req.message or ""
+    hint = req.lang_hint
+    if len(msg) > CACHE_MAX_LEN:
+        # Long pastes miss the classifier caches and the scope check runs the
+        # full rule scan; keep that work off the event loop.
+        (in_scope, lang_gate, scope_reason, scope_tag), lang = await asyncio.gather(
+            asyncio.to_thread(check_scope, msg),
+            asyncio.to_thread(detect_language, msg, hint),
+        )
+    else:
+        in_scope, lang_gate, scope_reason, scope_tag = check_scope(msg)
+        lang = detect_language(msg, hint=hint)
+    lower = msg.lower()
+    return Preproc(
+        message=msg,
+        lower=lower,
+        hints=classify(lower),
+        in_scope=in_scope,
+        lang_gate=lang_gate,
+        scope_reason=scope_reason,
+        scope_tag=scope_tag,
+        lang=lang,
+        is_pw_q=is_password_question(msg, lang),
+        is_fup=is_followup(msg, lang),
+        key=sess_key(req, request),
+    )
@@ -3,7 +3,7 @@ from fastapi import APIRouter, HTTPException
 from typing import Optional
 
 from app.models import AnalyzeRequest, RiskReport, RiskFinding
-from app.api.helpers import scams, log_event, redact
+from app.api.helpers import scams, log_event, redact, json_response
 
 router = APIRouter()
 
@@ -14,7 +14,8 @@ async def analyze_text(req: AnalyzeRequest):
 
     text = req.text or " ".join(req.urls or [])
     res = scams.analyze_text(text, lang_hint=req.lang_hint)
-    findings = [RiskFinding(**f) for f in res.get("findings", [])]
+    # the detector builds these dicts itself; skip re-validating trusted shapes
+    findings = [RiskFinding.model_construct(**f) for f in res.get("findings") or ()]
 
     try:
         log_event(
@@ -28,9 +29,9 @@ async def analyze_text(req: AnalyzeRequest):
     except Exception:
         pass
 
-    return RiskReport(
+    return json_response(RiskReport.model_construct(
         risk_level=res.get("risk_level", "low"),
         score=res.get("score", 0),
         findings=findings,
         language=res.get("language", "en"),
-    )
\ No newline at end of file
+    ))
\ No newline at end of file
@@ -1,7 +1,14 @@
 from __future__ import annotations
-from typing import Optional, List, Tuple, Dict, Any
-from collections import defaultdict, deque
+from typing import Optional, List, Tuple, Dict, Any, Collection, Iterator
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
 import os
+import re
+import time
+
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 
 # ---- logging shim (safe if module is missing) ----
 try:
@@ -12,23 +19,20 @@ except Exception:  # pragma: no cover
     def tail_jsonl(n: int):  # type: ignore
         return []
 
-# ---- Optional OpenAI client (lazy) ----
-try:
-    from openai import OpenAI  # type: ignore
-except Exception:  # pragma: no cover
-    OpenAI = None  # type: ignore
-
 # ---- Project engines & utils ----
-from app.engine.rule_engine import RuleEngine
+from app.engine.rule_engine import RuleEngine, scope_check as _scope_check
 from app.engine.scam_detector import ScamDetector
 from app.engine.fallback import AIFallback
 from app.nlp.redactor import redact
-from app.nlp.lang import detect_language
+from app.nlp.lang import detect_language as _detect_language
 
 # ---- Singletons ----
 rules = RuleEngine("data/knowledge.json")
 scams = ScamDetector()
 ai = AIFallback()
+# Routers check this before awaiting any AI helper, so deployments without a
+# key skip those calls entirely.
+AI_ENABLED = bool(ai.enabled and ai.client)
 
 # ---- Constants ----
 OUT_OF_SCOPE_EN = (
@@ -64,9 +68,74 @@ SYSTEM_PROMPT = (
 OPENAI_MODEL = os.environ.get("AT_MODEL", "gpt-4o-mini")
 
 # ---- follow-up memory (very light) ----
-SESS: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
-    "topic": None, "step": 0, "lang": "en", "hist": deque(maxlen=6)
-})
+HIST_SIZE = 6
+
+class HistoryRing:
+    """Fixed-size (role, text) history; once full, the oldest entry is overwritten."""
+    __slots__ = ("buf", "i")
+
+    def __init__(self) -> None:
+        self.buf: List[Optional[Tuple[str, str]]] = [None] * HIST_SIZE
+        self.i = 0
+
+    def append(self, item: Tuple[str, str]) -> None:
+        self.buf[self.i % HIST_SIZE] = item
+        self.i += 1
+
+    def clear(self) -> None:
+        self.buf[:] = [None] * HIST_SIZE
+        self.i = 0
+
+    def __len__(self) -> int:
+        return min(self.i, HIST_SIZE)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Entries oldest → newest, read in place (no copy)."""
+        n = len(self)
+        start = (self.i - n) % HIST_SIZE
+        for k in range(start, start + n):
+            yield self.buf[k % HIST_SIZE]  # type: ignore[misc]
+
+@dataclass(slots=True)
+class Session:
+    topic: Optional[str] = None
+    step: int = 0
+    lang: str = "en"
+    hist: HistoryRing = field(default_factory=HistoryRing)
+    last_match: Optional[Dict[str, Any]] = None  # last rules.match() result, reused by short follow-ups
+    seen: float = 0.0  # monotonic time of last access
+
+# Sessions are keyed by client id/IP, so cap how many we keep and let idle ones expire.
+SESS_MAX = int(os.environ.get("SESS_MAX", "10000"))
+SESS_TTL = float(os.environ.get("SESS_TTL_SECS", "3600"))
+
+class SessionStore:
+    """LRU of sessions: store[key] returns (creating if needed) a live session."""
+    __slots__ = ("_d",)
+
+    def __init__(self) -> None:
+        self._d: "OrderedDict[str, Session]" = OrderedDict()
+
+    def __getitem__(self, key: str) -> Session:
+        now = time.monotonic()
+        d = self._d
+        sess = d.get(key)
+        if sess is None or now - sess.seen > SESS_TTL:
+            sess = d[key] = Session()
+        d.move_to_end(key)
+        sess.seen = now
+        # least recently used first: drop expired entries, then any overflow
+        while d:
+            oldest = next(iter(d.values()))
+            if now - oldest.seen <= SESS_TTL and len(d) <= SESS_MAX:
+                break
+            d.popitem(last=False)
+        return sess
+
+    def __len__(self) -> int:
+        return len(self._d)
+
+SESS = SessionStore()
 
 FOLLOWUP_MARKERS = {
     "en": [
@@ -77,9 +146,60 @@ FOLLOWUP_MARKERS = {
     "my": ["လုပ်ပြီးပြီ", "ပြီးပြီ", "မရသေး", "နောက်", "နောက်အဆင့်", "မအောင်မြင်သေး", "မရဘူး"],
 }
 
+# ---- memoized classifiers ----
+# Short messages ("hi", "done", "next") recur constantly; long pastes are
+# nearly always unique, so they skip the caches.
+CACHE_MAX_LEN = 256
+
+def _memo_short(maxsize: int):
+    """LRU-cache fn(text, *args) keyed on the stripped/lowercased text."""
+    def deco(fn):
+        cached = lru_cache(maxsize=maxsize)(fn)
+
+        @wraps(fn)
+        def wrapper(text: str, *args):
+            t = (text or "").strip().lower()
+            if len(t) > CACHE_MAX_LEN:
+                return fn(t, *args)
+            return cached(t, *args)
+
+        wrapper.cache_clear = cached.cache_clear  # type: ignore[attr-defined]
+        return wrapper
+    return deco
+
+@_memo_short(4096)
+def _lang_of(t: str, hint: Optional[str]) -> str:
+    return _detect_language(t, hint=hint)
+
+def detect_language(text: str, hint: Optional[str] = None) -> str:
+    return _lang_of(text, hint)
+
+# one alternation per language: a single scan instead of a substring test per marker
+_FOLLOWUP_RE = {
+    lang: re.compile("|".join(map(re.escape, sorted(words, key=len, reverse=True))))
+    for lang, words in FOLLOWUP_MARKERS.items()
+}
+
+@_memo_short(4096)
 def is_followup(text: str, lang: str) -> bool:
-    t = (text or "").lower()
-    return any(k in t for k in FOLLOWUP_MARKERS.get(lang, []))
+    rx = _FOLLOWUP_RE.get(lang)
+    return bool(rx and rx.search(text))
+
+@_memo_short(2048)
+def _scope_of(t: str, kb_version: int) -> Tuple[bool, str, str, str]:
+    return _scope_check(t, rules=rules)
+
+def check_scope(text: str) -> Tuple[bool, str, str, str]:
+    """Cached scope_check() against the shared RuleEngine (keyed on its KB version)."""
+    return _scope_of(text, rules.version)
+
+@_memo_short(2048)
+def _match_of(t: str, lang: str, kb_version: int) -> Dict[str, Any]:
+    return rules.match(t, lang_hint=lang)
+
+def match_rules(text: str, lang: str) -> Dict[str, Any]:
+    """Cached rules.match() (keyed on the KB version); callers get their own copy."""
+    return dict(_match_of(text, lang, rules.version))
 
 def _answer_for(intent: str, lang: str) -> str:
     try:
@@ -91,32 +211,41 @@ def _answer_for(intent: str, lang: str) -> str:
 
 def sess_key(req, request) -> str:
     return (
-        getattr(req, "session_id", None)
+        req.session_id
         or request.headers.get("x-forwarded-for")
         or (request.client.host if request.client else "anon")
     )
 
+_OUT_OF_SCOPE = {
+    "en": OUT_OF_SCOPE_EN + _BANNER_EN,
+    "my": OUT_OF_SCOPE_MY + _BANNER_MY,
+}
+
 def out_of_scope(lang: str) -> str:
-    msg = OUT_OF_SCOPE_MY if lang == "my" else OUT_OF_SCOPE_EN
-    return msg + banner_for(lang)
+    return _OUT_OF_SCOPE.get(lang, _OUT_OF_SCOPE["en"])
 
-def sensitive_redirect(lang: str) -> str:
+@lru_cache(maxsize=8)
+def _sensitive_redirect(lang: str, kb_version: int) -> str:
     txt = _answer_for("personal_account_scope", lang) or _answer_for("personal_account_scope", "en")
     if not txt:
         return OUT_OF_SCOPE_MY if lang == "my" else OUT_OF_SCOPE_EN
     return txt
 
-# OpenAI client (sync streaming usage)
+def sensitive_redirect(lang: str) -> str:
+    return _sensitive_redirect(lang, rules.version)
+
+def json_response(model: BaseModel) -> ORJSONResponse:
+    """Serialize a response model once with orjson (FastAPI skips re-validating a Response)."""
+    return ORJSONResponse(model.model_dump())
+
+# OpenAI client (async streaming usage)
 def get_openai_client():
-    if OpenAI is None:
-        return None
-    key = os.environ.get("OPENAI_API_KEY")
-    if not key:
-        return None
-    try:
-        return OpenAI(api_key=key)
-    except Exception:
-        return None
+    """The process-wide AsyncOpenAI client owned by `ai` (None without a key).
+
+    Sharing it keeps one keep-alive connection pool instead of a new client
+    (and TLS handshake) per streamed request.
+    """
+    return ai.client
 
 # Grounded AI rewrite wrapper
 async def rewrite_with_ai(
@@ -127,7 +256,7 @@ async def rewrite_with_ai(
     flow_steps: Optional[List[str]] = None,
     safety_notes: Optional[List[str]] = None,
     intent: Optional[str] = None,
-    context: Optional[List[Tuple[str, str]]] = None,
+    context: Optional[Collection[Tuple[str, str]]] = None,
 ) -> Optional[str]:
     try:
         return await ai.answer_grounded(
@@ -1,20 +1,52 @@
 from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Optional
 from fastapi import APIRouter, UploadFile, File
-import io
+import asyncio
+import os
 
 from app.models import RiskReport, RiskFinding
 from app.api.helpers import scams, log_event
+from app.utils.files import ocr_bytes
 
 router = APIRouter()
 
+# ---- OCR worker pool ----
+# Tesseract takes hundreds of ms per image; run it in worker processes so the
+# event loop keeps serving chat streams. Created on first upload. Workers are
+# spawned (not forked from this threaded, event-loop process) and each one is
+# a full Tesseract, so keep the count small.
+OCR_WORKERS = max(1, int(os.environ.get("OCR_WORKERS", "1")))
+_ocr_pool: Optional[ProcessPoolExecutor] = None
+
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    global _ocr_pool
+    if _ocr_pool is None:
+        _ocr_pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, mp_context=get_context("spawn"))
+    return _ocr_pool
+
+def shutdown_ocr_pool() -> None:
+    global _ocr_pool
+    if _ocr_pool is not None:
+        _ocr_pool.shutdown(wait=False, cancel_futures=True)
+        _ocr_pool = None
+
+async def _ocr(content: bytes) -> str:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_ocr_pool(), ocr_bytes, content)
+    except BrokenProcessPool:
+        # a worker died (crash/OOM kill): replace the pool and retry once
+        shutdown_ocr_pool()
+        return await loop.run_in_executor(_get_ocr_pool(), ocr_bytes, content)
+
 @router.post("/upload", response_model=RiskReport)
 async def upload_file(file: UploadFile = File(...)):
     try:
-        import pytesseract  # type: ignore
-        from PIL import Image  # type: ignore
         content = await file.read()
-        img = Image.open(io.BytesIO(content))
-        text = pytesseract.image_to_string(img)
+        text = await _ocr(content)
     except Exception:
         text = ""
 
@@ -1,8 +1,11 @@
 # app/engine/fallback.py
 from __future__ import annotations
+import asyncio
 import os
-from typing import Optional, List, Tuple, Dict, Any
-from openai import AsyncOpenAI  # async client
+import random
+from functools import lru_cache
+from itertools import islice
+from typing import Optional, List, Tuple, Dict, Any, Collection, Iterable
 
 # --- Base personas (kept strict; localized voice) ---
 SYSTEM_EN = (
@@ -41,6 +44,22 @@ STYLE_MY = (
     "- ပိုပြီးရှည်လျားသော စကားများ မသုံးပါနှင့် — အချက် ၃–၆ ခန့်ပဲ ထုတ်ပေးပါ။\n"
 )
 
+# --- Grounded-answer prompt pieces ---
+_GROUNDING_HEAD = "Grounding (use to stay accurate & local; rewrite naturally, do NOT quote verbatim):\n"
+
+def _output_rules(language: str) -> str:
+    return (
+        "\nOutput rules:\n"
+        f"- Language: {language}\n"
+        "- 3–6 bullet points or steps; include concrete, local examples.\n"
+        "- Be unique, friendly, and specific—avoid generic boilerplate.\n"
+        "- Never request or process OTP/PIN/passwords. No account operations.\n"
+    )
+
+_OUTPUT_RULES_EN = _output_rules("English")
+_OUTPUT_RULES_MY = _output_rules("Burmese")
+
+@lru_cache(maxsize=4)
 def _system(lang: str) -> str:
     base = SYSTEM_MY if lang == "my" else SYSTEM_EN
     style = STYLE_MY if lang == "my" else STYLE_EN
@@ -54,19 +73,66 @@ class AIFallback:
       - answer()           → plain model answer (strict system prompt)
       - answer_grounded()  → use scenario/KB snippets as grounding so outputs stay localized & unique
       - answer_with_system() → advanced custom system + optional chat history
+      - answer_batch()     → many answer() calls concurrently over the shared client
     """
     def __init__(self):
         self.enabled = bool(os.getenv("OPENAI_API_KEY"))
         self.timeout = int(os.getenv("LLM_TIMEOUT", "60"))
-        self.client = AsyncOpenAI(timeout=self.timeout, max_retries=2) if self.enabled else None
+        self.client = None
+        # transient failures (rate limit / timeout / dropped connection / 5xx)
+        # are retried by _respond() with exponential backoff + jitter
+        self.retries = max(0, int(os.getenv("LLM_RETRIES", "3")))
+        self._retryable: Tuple[type, ...] = ()
+        if self.enabled:
+            # openai is a heavy import; only pay for it when a key is configured
+            import httpx
+            from openai import (
+                AsyncOpenAI, DefaultAsyncHttpxClient,
+                APIConnectionError, APITimeoutError, RateLimitError, InternalServerError,
+            )
+            # APITimeoutError subclasses APIConnectionError; listed for clarity
+            self._retryable = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+            # One pooled client per process (shared with /chat/stream via
+            # helpers.get_openai_client). Keep idle connections longer than the
+            # SDK's 5s so chat turns a few seconds apart reuse the TLS session.
+            limits = httpx.Limits(
+                max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "1000")),
+                max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE", "100")),
+                keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_SECS", "30")),
+            )
+            self.client = AsyncOpenAI(
+                timeout=self.timeout,
+                max_retries=2,
+                http_client=DefaultAsyncHttpxClient(limits=limits, timeout=self.timeout),
+            )
+            # same pool, but _respond() owns the retries for non-streaming calls
+            self._api = self.client.with_options(max_retries=0)
         self.model = os.getenv("AI_MODEL", "gpt-4o-mini")
 
+    async def _respond(self, **kwargs: Any) -> Optional[str]:
+        """responses.create() → stripped output_text, retrying transient errors.
+
+        Waits 0.5s, 1s, 2s … (capped at 8s) plus up to 0.3s of jitter between
+        attempts so concurrent callers don't retry in lockstep. Other errors
+        (and the last transient one) propagate to the caller.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                resp = await self._api.responses.create(timeout=self.timeout, **kwargs)
+                break
+            except self._retryable:
+                if attempt >= self.retries:
+                    raise
+                await asyncio.sleep(min(8.0, 0.5 * 2 ** attempt) + random.random() * 0.3)
+        out = getattr(resp, "output_text", None)
+        return out.strip() if out else None
+
     # ---------------- basic fallback (kept for compatibility) ----------------
     async def answer(self, user_text: str, language: str) -> Optional[str]:
         if not (self.enabled and self.client):
             return None
         try:
-            resp = await self.client.responses.create(
+            return await self._respond(
                 model=self.model,
                 input=[
                     {"role": "system", "content": _system(language)},
@@ -74,10 +140,7 @@ class AIFallback:
                 ],
                 max_output_tokens=450,
                 temperature=0.35,
-                timeout=self.timeout,
             )
-            out = getattr(resp, "output_text", None)
-            return out.strip() if out else None
         except Exception:
             return None
 
@@ -92,7 +155,7 @@ class AIFallback:
         safety_notes: Optional[List[str]] = None,
         intent: Optional[str] = None,
         examples: Optional[List[Tuple[str, str]]] = None,  # (user, assistant) few-shots
-        context: Optional[List[Tuple[str, str]]] = None,   # chat history
+        context: Optional[Collection[Tuple[str, str]]] = None,   # chat history
     ) -> Optional[str]:
         """
         Let AI do the final wording, but *ground* it with your scenario content.
@@ -101,24 +164,25 @@ class AIFallback:
         if not (self.enabled and self.client):
             return None
 
-        # Build a compact grounding block the model can lean on
-        ground_lines: List[str] = []
+        # Final user request: message + a compact grounding block the model can
+        # lean on, collected in one list and joined once.
+        parts: List[str] = [f"User message:\n{user_text}\n\n", _GROUNDING_HEAD]
+        add = parts.append
         if intent:
-            ground_lines.append(f"[intent] {intent}")
-        if kb_points:
-            for p in kb_points:
-                if p:
-                    ground_lines.append(f"[point] {p}")
-        if flow_steps:
-            for i, st in enumerate(flow_steps, 1):
-                if st:
-                    ground_lines.append(f"[step {i}] {st}")
-        if safety_notes:
-            for sn in safety_notes:
-                if sn:
-                    ground_lines.append(f"[safety] {sn}")
-
-        grounding = "\n".join(ground_lines) if ground_lines else "(no explicit KB provided)"
+            add(f"[intent] {intent}\n")
+        for p in kb_points or ():
+            if p:
+                add(f"[point] {p}\n")
+        for i, st in enumerate(flow_steps or (), 1):
+            if st:
+                add(f"[step {i}] {st}\n")
+        for sn in safety_notes or ():
+            if sn:
+                add(f"[safety] {sn}\n")
+        if len(parts) == 2:
+            add("(no explicit KB provided)\n")
+        add(_OUTPUT_RULES_MY if lang == "my" else _OUTPUT_RULES_EN)
+        user_block = "".join(parts)
 
         # Messages
         messages: List[Dict[str, Any]] = [{"role": "system", "content": _system(lang)}]
@@ -131,32 +195,19 @@ class AIFallback:
 
         # Optional short chat history
         if context:
-            for role, msg in context[-4:]:
+            for role, msg in islice(context, max(0, len(context) - 4), None):
                 if role in {"user", "assistant"} and msg:
                     messages.append({"role": role, "content": msg})
 
-        # Final user request with grounding
-        user_block = (
-            f"User message:\n{user_text}\n\n"
-            f"Grounding (use to stay accurate & local; rewrite naturally, do NOT quote verbatim):\n{grounding}\n\n"
-            f"Output rules:\n"
-            f"- Language: {'Burmese' if lang=='my' else 'English'}\n"
-            f"- 3–6 bullet points or steps; include concrete, local examples.\n"
-            f"- Be unique, friendly, and specific—avoid generic boilerplate.\n"
-            f"- Never request or process OTP/PIN/passwords. No account operations.\n"
-        )
         messages.append({"role": "user", "content": user_block})
 
         try:
-            resp = await self.client.responses.create(
+            return await self._respond(
                 model=self.model,
                 input=messages,
                 max_output_tokens=500,
                 temperature=0.35,
-                timeout=self.timeout,
             )
-            out = getattr(resp, "output_text", None)
-            return out.strip() if out else None
         except Exception:
             return None
 
@@ -166,7 +217,7 @@ class AIFallback:
         system: str,
         user_text: str,
         lang: str,
-        context: Optional[List[Tuple[str, str]]] = None,
+        context: Optional[Collection[Tuple[str, str]]] = None,
     ) -> Optional[str]:
         if not (self.enabled and self.client):
             return None
@@ -182,14 +233,31 @@ class AIFallback:
         messages.append({"role": "user", "content": user_text})
 
         try:
-            resp = await self.client.responses.create(
+            return await self._respond(
                 model=self.model,
                 input=messages,
                 max_output_tokens=450,
                 temperature=0.3,
-                timeout=self.timeout,
             )
-            out = getattr(resp, "output_text", None)
-            return out.strip() if out else None
         except Exception:
             return None
+
+    # ---------------- bulk: independent questions at once --------------------
+    async def answer_batch(
+        self,
+        items: Iterable[Tuple[str, str]],  # (user_text, language)
+        concurrency: int = 16,
+    ) -> List[Optional[str]]:
+        """
+        Run answer() for each item concurrently (at most 'concurrency' in
+        flight) so N requests cost about one round-trip instead of N.
+        Results keep the input order; failures come back as None.
+        """
+        sem = asyncio.Semaphore(max(1, concurrency))
+
+        async def one(user_text: str, language: str) -> Optional[str]:
+            async with sem:
+                return await self.answer(user_text, language)
+
+        results = await asyncio.gather(*(one(u, lang) for u, lang in items), return_exceptions=True)
+        return [None if isinstance(r, BaseException) else r for r in results]
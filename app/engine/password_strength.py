@@ -1,9 +1,11 @@
 from __future__ import annotations
+import itertools
 import math
+import operator
 import secrets
 import string
-import regex as re
-from typing import List, Dict
+import re
+from typing import List, Dict, Optional
 
 # ------------------- config -------------------
 # Show/hide the "(~X bits of entropy)" suffix in responses.
@@ -25,17 +27,26 @@ _EN_STRONG_WEAK = r"(strong|weak|safe|good|okay|secure)"
 _MY_PASSWORD = r"(စကားဝှက်|password)"
 _MY_STRONG_WEAK = r"(အားကောင်း|အားနည်း|လုံခြုံ)"
 
+# compiled once; these run on every chat message
+_PW_Q_EN1 = re.compile(rf"\b(is|my|this)\b.*\bpassword\b.*\b{_EN_STRONG_WEAK}\b", re.I)
+_PW_Q_EN2 = re.compile(rf"\bpassword\b.*\b{_EN_STRONG_WEAK}\b\??$", re.I)
+_PW_Q_MY = re.compile(rf"{_MY_PASSWORD}.*{_MY_STRONG_WEAK}")
+_PW_MENTION = re.compile(r"password|စကားဝှက်", re.I)
+_QUOTED = re.compile(r"[\"“‘']([^\"”’']{3,64})[\"”’']")
+_AFTER_PW = re.compile(r"password\s+([^\s\"'、၊။]{3,64})", re.I)
+_AFTER_MY_PW = re.compile(r"(?:စကားဝှက်)\s*([^\s\"'、၊။]{3,64})")
+
 def _has_pw_question(text_norm: str) -> bool:
     # Obvious English questions
-    if re.search(rf"\b(is|my|this)\b.*\bpassword\b.*\b{_EN_STRONG_WEAK}\b", text_norm, flags=re.I):
+    if _PW_Q_EN1.search(text_norm):
         return True
-    if re.search(rf"\bpassword\b.*\b{_EN_STRONG_WEAK}\b\??$", text_norm, flags=re.I):
+    if _PW_Q_EN2.search(text_norm):
         return True
     # Myanmar
-    if re.search(rf"{_MY_PASSWORD}.*{_MY_STRONG_WEAK}", text_norm):
+    if _PW_Q_MY.search(text_norm):
         return True
     # If a quoted thing is present and the sentence mentions password at all
-    if re.search(r"password|စကားဝှက်", text_norm, flags=re.I) and re.search(r"[\"“‘']([^\"”’']{3,64})[\"”’']", text_norm):
+    if _PW_MENTION.search(text_norm) and _QUOTED.search(text_norm):
         return True
     return False
 
@@ -43,11 +54,11 @@ def is_password_question(text: str, lang: str) -> bool:
     t = (text or "").strip()
     return _has_pw_question(t)
 
+_EXAMPLES_EN = re.compile(r"example|sample|recommend|suggest", re.I)  # "example" covers "examples"
+_EXAMPLES_MY = re.compile(r"နမူနာ|ဥပမာ")
+
 def wants_examples(text: str, lang: str) -> bool:
-    t = (text or "").lower()
-    if lang == "my":
-        return ("နမူနာ" in t) or ("ဥပမာ" in t)
-    return any(w in t for w in ("example", "examples", "sample", "recommend", "suggest"))
+    return bool((_EXAMPLES_MY if lang == "my" else _EXAMPLES_EN).search(text or ""))
 
 def extract_password_candidates(text: str) -> List[str]:
     """
@@ -57,18 +68,18 @@ def extract_password_candidates(text: str) -> List[str]:
     t = text or ""
 
     # 1) Quoted strings “like this” or 'like_this'
-    quoted = re.findall(r"[\"“‘']([^\"”’']{3,64})[\"”’']", t)
+    quoted = _QUOTED.findall(t)
     cands: List[str] = [s.strip() for s in quoted if s.strip()]
 
     # 2) Token after 'password' e.g., "is password Ak12$m strong?"
     if not cands:
-        m = re.search(r"password\s+([^\s\"'、၊။]{3,64})", t, flags=re.I)
+        m = _AFTER_PW.search(t)
         if m:
             cands.append(m.group(1))
 
     # 3) Myanmar: after စကားဝှက်
     if not cands:
-        m2 = re.search(r"(?:စကားဝှက်)\s*([^\s\"'、၊။]{3,64})", t)
+        m2 = _AFTER_MY_PW.search(t)
         if m2:
             cands.append(m2.group(1))
 
@@ -85,13 +96,19 @@ def extract_password_candidates(text: str) -> List[str]:
 
 # ------------------- scoring & feedback -------------------
 
+_LOWER = frozenset(string.ascii_lowercase)
+_UPPER = frozenset(string.ascii_uppercase)
+_DIGIT = frozenset(string.digits)
+_SYMBOL = frozenset(string.punctuation)
+
 def _char_classes(pw: str) -> Dict[str, bool]:
+    chars = set(pw)  # one pass over the password; class tests run on the set
     return {
-        "lower": any("a" <= ch <= "z" for ch in pw),
-        "upper": any("A" <= ch <= "Z" for ch in pw),
-        "digit": any("0" <= ch <= "9" for ch in pw),
-        "symbol": any(ch in string.punctuation for ch in pw),
-        "space": any(ch.isspace() for ch in pw),
+        "lower": not chars.isdisjoint(_LOWER),
+        "upper": not chars.isdisjoint(_UPPER),
+        "digit": not chars.isdisjoint(_DIGIT),
+        "symbol": not chars.isdisjoint(_SYMBOL),
+        "space": any(ch.isspace() for ch in chars),
     }
 
 def _is_sequence(pw: str) -> bool:
@@ -104,28 +121,31 @@ def _is_sequence(pw: str) -> bool:
     # alternating ABAB (simple)
     if len(set(pw)) <= 2 and pw[:2] * (len(pw)//2) in pw:
         return True
-    # monotonic ASCII sequences
-    asc = all(ord(pw[i+1]) - ord(pw[i]) == 1 for i in range(len(pw)-1))
-    desc = all(ord(pw[i]) - ord(pw[i+1]) == 1 for i in range(len(pw)-1))
-    return asc or desc
+    # monotonic ASCII sequences: every step between neighbours is +1 (or every one is -1)
+    codes = list(map(ord, pw))
+    steps = set(map(operator.sub, codes[1:], codes))
+    return steps == {1} or steps == {-1}
 
-def _entropy_bits(pw: str) -> float:
-    classes = _char_classes(pw)
-    pool = 0
-    if classes["lower"]:  pool += 26
-    if classes["upper"]:  pool += 26
-    if classes["digit"]:  pool += 10
-    if classes["symbol"]: pool += len(string.punctuation)
+def _pool_size(lower: bool, upper: bool, digit: bool, symbol: bool) -> int:
+    pool = 26 * lower + 26 * upper + 10 * digit + len(string.punctuation) * symbol
     # Avoid zero; if weird chars, give a small pool
-    if pool == 0:
-        pool = 20
-    return round(len(pw) * math.log2(pool), 1)
+    return pool or 20
+
+# log2(pool size) for every (lower, upper, digit, symbol) combination
+_POOL_LOG2 = {
+    flags: math.log2(_pool_size(*flags))
+    for flags in itertools.product((False, True), repeat=4)
+}
+
+def _entropy_bits(pw: str, classes: Optional[Dict[str, bool]] = None) -> float:
+    c = classes or _char_classes(pw)
+    return round(len(pw) * _POOL_LOG2[c["lower"], c["upper"], c["digit"], c["symbol"]], 1)
 
 def assess_password(pw: str) -> Dict[str, object]:
     pwn = pw.lower()
     length = len(pw)
     classes = _char_classes(pw)
-    entropy = _entropy_bits(pw)
+    entropy = _entropy_bits(pw, classes)
     is_common = pwn in COMMON
     looks_seq = _is_sequence(pw)
 
@@ -168,7 +188,7 @@ def assess_password(pw: str) -> Dict[str, object]:
 def _mask(pw: str) -> str:
     if len(pw) <= 2:
         return "*" * len(pw)
-    return pw[0] + ("*" * (len(pw) - 2)) + pw[-1]
+    return f"{pw[0]}{'*' * (len(pw) - 2)}{pw[-1]}"
 
 def format_assessment(pw: str, lang: str = "en") -> str:
     r = assess_password(pw)
@@ -213,9 +233,21 @@ SAFE_SYMBOLS = "!@#$%^&*?-_"
 SAFE_ALPHA = "ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnpqrstuvwxyz"  # avoid easily confusable chars
 SAFE_DIGITS = "23456789"  # avoid 0/1
 
+_PW_POOL = SAFE_ALPHA + SAFE_DIGITS + SAFE_SYMBOLS
+# largest multiple of the pool size that fits in a byte; bytes at or above it
+# are rejected so every pool character stays equally likely
+_PW_BYTE_LIMIT = 256 - (256 % len(_PW_POOL))
+
 def generate_random_password(length: int = 14) -> str:
-    pool = SAFE_ALPHA + SAFE_DIGITS + SAFE_SYMBOLS
-    return "".join(secrets.choice(pool) for _ in range(length))
+    out: List[str] = []
+    while len(out) < length:
+        # one urandom read per round instead of one secrets.choice() per char
+        for b in secrets.token_bytes(2 * (length - len(out))):
+            if b < _PW_BYTE_LIMIT:
+                out.append(_PW_POOL[b % len(_PW_POOL)])
+                if len(out) == length:
+                    break
+    return "".join(out)
 
 def generate_examples(n: int = 3) -> List[str]:
     return [generate_random_password() for _ in range(max(1, min(n, 5)))]
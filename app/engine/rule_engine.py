@@ -1,11 +1,26 @@
 # app/engine/rule_engine.py
 from __future__ import annotations
 
+import heapq
 import json
 import os
 import re
 from difflib import SequenceMatcher
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import orjson
+
+try:  # optional: linear-time DFA matching (pip install google-re2)
+    import re2 as _re2  # type: ignore
+except Exception:  # pragma: no cover
+    _re2 = None
+
+try:  # C++ similarity ratio for the fuzzy fallback (in requirements.txt)
+    from rapidfuzz import process as _rf_process  # type: ignore
+    from rapidfuzz.fuzz import ratio as _rf_ratio  # type: ignore
+except Exception:  # pragma: no cover
+    _rf_process = _rf_ratio = None
 
 # ---------------------------------------------------------------------
 # Normalization / language helpers
@@ -16,21 +31,43 @@ except Exception:
     def _normalize(text: str) -> str:
         return (text or "").strip()
 
+_MY_RE = re.compile(r"[\u1000-\u109F]")
+
+def _fallback_language(text: str, hint: Optional[str] = None) -> str:
+    return "my" if _MY_RE.search(text or "") else (hint or "en")
+
 try:
     from app.nlp.lang import detect_language as _detect_language
 except Exception:
-    def _detect_language(text: str, hint: Optional[str] = None) -> str:
-        return "my" if any("\u1000" <= ch <= "\u109F" for ch in (text or "")) else (hint or "en")
+    _detect_language = _fallback_language
+
+# scope_check, match and trace each detect the language of the same message;
+# memoize short texts (long pastes are rarely repeated and would pin memory).
+_LANG_CACHE_MAX_LEN = 256
 
+@lru_cache(maxsize=2048)
+def _detect_cached(text: str, hint: Optional[str]) -> str:
+    return _detect_language(text, hint=hint)
 
 def detect_language(text: str, hint: Optional[str] = None) -> str:
     try:
+        if text and len(text) <= _LANG_CACHE_MAX_LEN:
+            return _detect_cached(text, hint)
         return _detect_language(text, hint=hint)
     except Exception:
-        return "my" if any("\u1000" <= ch <= "\u109F" for ch in (text or "")) else (hint or "en")
+        return _fallback_language(text, hint)
+
+
+# The same message is normalized by scope_check, match and trace in turn.
+_PREP_CACHE_MAX_LEN = 256
 
+@lru_cache(maxsize=8192)
+def _prep_cached(text: str) -> str:
+    return _normalize(text)
 
 def _prep(text: str) -> str:
+    if text and len(text) <= _PREP_CACHE_MAX_LEN:
+        return _prep_cached(text)
     return _normalize(text or "")
 
 
@@ -38,59 +75,280 @@ def _prep(text: str) -> str:
 # Scoring helpers
 # ---------------------------------------------------------------------
 RULE_MIN_SCORE = float(os.environ.get("RULE_MIN_SCORE", "0.82"))  # global floor
+FUZZY_MIN = 0.92  # fuzzy fallback only counts near-identical phrasing
 
-def _score_hit(text_norm: str, patt: str) -> float:
+# Compiled form of one KB term: (regex, None), or (None, lowered literal) when
+# the term isn't a valid regex and falls back to substring matching.
+_Term = Tuple[Optional["re.Pattern[str]"], Optional[str]]
+
+def _compile_term(patt: str) -> _Term:
+    try:
+        return re.compile(patt, re.I), None
+    except re.error:
+        return None, patt.lower()
+
+def _term_score(text_norm: str, term: _Term) -> float:
     """
     Regex/contains score. 'text_norm' must already be normalized.
-    If pattern isn't a valid regex, fallback to substring.
+    A regex hit scores 1.0; a substring-fallback term scores 0.8.
     """
+    rx, lit = term
+    if rx is not None:
+        return 1.0 if rx.search(text_norm) else 0.0
+    return 0.8 if lit in text_norm.lower() else 0.0
+
+class _CompiledEntry(NamedTuple):
+    any_rx: Optional[Any]  # alternation of every valid regex term (prefilter)
+    pats: List[_Term]
+    syns: List[_Term]
+    fuzzy: List[str]       # normalized first patterns for the fuzzy fallback
+    cap: float             # highest score the entry can reach (every term hits)
+    plits: List[_Term]     # substring-fallback patterns/synonyms: the only terms
+    slits: List[_Term]     # that can score when the prefilter misses
+
+def _compile_entry(e: Dict[str, Any]) -> _CompiledEntry:
+    """
+    Precompile an entry's patterns/synonyms, plus one alternation of all its
+    valid regexes. A message that misses the alternation misses every one of
+    them, so most entries are ruled out with a single search.
+    """
+    patt = e.get("patterns") or []
+    pats = [_compile_term(p) for p in patt]
+    syns = [_compile_term(s) for s in e.get("synonyms") or []]
+    src = _alternation(pats + syns)
+    return _CompiledEntry(
+        _compile_any(src) if src else None, pats, syns, [_prep(p) for p in patt[:3]],
+        len(pats) + len(syns) * 0.6,  # ≥ the 0.4 fuzzy score whenever patterns exist
+        [t for t in pats if t[0] is None], [t for t in syns if t[0] is None],
+    )
+
+def _alternation(terms: List[_Term]) -> str:
+    return "|".join(f"(?:{t[0].pattern})" for t in terms if t[0] is not None)
+
+def _re2_ok(src: str) -> bool:
+    # re2's word/space classes are ASCII-only (re's are Unicode), so only hand
+    # it escape-free terms
+    return _re2 is not None and "\\" not in src
+
+def _compile_any(src: str) -> Optional[Any]:
+    """
+    Case-insensitive alternation 'src' used as a prefilter: it only has to
+    hit whenever one of its terms would. Compiled with re2 when possible.
+    """
+    if _re2_ok(src):
+        try:
+            return _re2.compile("(?i)" + src)
+        except Exception:
+            pass
     try:
-        if re.search(patt, text_norm, flags=re.I):
-            return 1.0
-    except re.error:
-        if patt.lower() in text_norm.lower():
-            return 0.8
-    return 0.0
+        return re.compile(src, re.I)
+    except re.error:  # terms that only compile standalone; check them one by one
+        return None
 
+def _fuzzy(text_norm: str, b_norm: str, floor: float = 0.0) -> float:
+    """
+    Very light fuzzy match; both strings must already be normalized.
+    Returns 0.0 without the full O(n*m) comparison when the cheap upper
+    bounds already show the ratio can't reach 'floor'.
+
+    Scores come from rapidfuzz (a requirement) as its Indel ratio,
+    2*LCS/total length. The difflib fallback below is only for installs
+    without it, and its scores differ: SequenceMatcher counts matching
+    blocks, not the LCS, so it can score lower (never higher) and a
+    pattern near its fuzzy threshold may match only under rapidfuzz.
+    """
+    if _rf_ratio is not None:
+        return _rf_ratio(text_norm, b_norm, score_cutoff=floor * 100) / 100.0
+    la, lb = len(text_norm), len(b_norm)
+    # real_quick_ratio() from the lengths alone, before SequenceMatcher indexes b
+    if floor and la + lb and 2.0 * min(la, lb) / (la + lb) < floor:
+        return 0.0
+    sm = SequenceMatcher(None, text_norm, b_norm)
+    if sm.quick_ratio() < floor:
+        return 0.0
+    return sm.ratio()
+
+
+class _EntrySet:
+    """
+    Every entry's prefilter alternation in one re2.Set, so a single scan of
+    the message tells which of the covered entries can hit at all.
+    """
+    __slots__ = ("_set", "_ids", "covered")
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        opts = _re2.Options()
+        opts.case_sensitive = False
+        self._set = _re2.Set.SearchSet(opts)
+        self._ids: Dict[int, int] = {}  # set index -> entry index
+        for i, e in enumerate(entries):
+            c = e["_compiled"]
+            src = _alternation(c.pats + c.syns)
+            if src and _re2_ok(src):
+                try:
+                    self._ids[self._set.Add(src)] = i
+                except Exception:
+                    continue
+        self._set.Compile()
+        self.covered = frozenset(self._ids.values())
+
+    def hits(self, text_norm: str) -> frozenset:
+        return frozenset(self._ids[k] for k in self._set.Match(text_norm) or ())
+
+    @classmethod
+    def build(cls, entries: List[Dict[str, Any]]) -> Optional["_EntrySet"]:
+        if _re2 is None or not entries:
+            return None
+        try:
+            return cls(entries)
+        except Exception:
+            return None
 
-def _fuzzy(a: str, b: str) -> float:
-    """Very light fuzzy match on normalized strings."""
-    return SequenceMatcher(None, _prep(a), _prep(b)).ratio()
 
+class _FuzzyIndex:
+    """
+    Every entry's fuzzy patterns in one flat list, so a single rapidfuzz
+    call scores the message against all of them in C++.
+    """
+    __slots__ = ("_choices", "_owner")
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        self._choices: List[str] = []
+        self._owner: List[int] = []  # choice index -> entry index
+        for i, e in enumerate(entries):
+            for p in e["_compiled"].fuzzy:
+                self._choices.append(p)
+                self._owner.append(i)
+
+    def best(self, text_norm: str) -> Dict[int, float]:
+        """entry index -> best _fuzzy() score, for entries reaching FUZZY_MIN."""
+        out: Dict[int, float] = {}
+        for _, score, k in _rf_process.extract(
+            text_norm, self._choices, scorer=_rf_ratio, processor=None,
+            score_cutoff=FUZZY_MIN * 100, limit=None,
+        ):
+            i = self._owner[k]
+            out[i] = max(out.get(i, 0.0), score / 100.0)
+        return out
+
+    @classmethod
+    def build(cls, entries: List[Dict[str, Any]]) -> Optional["_FuzzyIndex"]:
+        if _rf_process is None or not entries:
+            return None
+        return cls(entries)
 
-def _candidates(entries: List[Dict[str, Any]], text: str) -> List[Tuple[str, float, Dict[str, Any]]]:
+
+def _sum_terms(
+    text_norm: str, pterms: List[_Term], sterms: List[_Term], cap: float, need: Optional[float],
+) -> Optional[float]:
+    """
+    Sum of term scores (synonyms weigh less). Returns None as soon as the
+    terms left can no longer lift the sum to 'need'.
+    """
+    score, rest = 0.0, cap
+    for terms, w in ((pterms, 1.0), (sterms, 0.6)):
+        for t in terms:
+            score += _term_score(text_norm, t) * w
+            rest -= w
+            # the epsilon keeps float drift in 'rest' from dropping exact ties
+            if need is not None and score + rest + 1e-9 < need:
+                return None
+    return score
+
+
+def _matched_label(e: Dict[str, Any]) -> str:
+    """The 'matched' summary reported for an entry: its first patterns/synonyms."""
+    patt = e.get("patterns") or []
+    syns = e.get("synonyms") or []
+    return ", ".join((patt[:2] + syns[:2])[:4])
+
+
+def _by_cap(entries: List[Dict[str, Any]]) -> List[int]:
+    """Entry indices, highest reachable score first (see _candidates' 'limit')."""
+    return sorted(range(len(entries)), key=lambda i: entries[i]["_compiled"].cap, reverse=True)
+
+def _candidates(
+    entries: List[Dict[str, Any]],
+    text: str,
+    entry_set: Optional[_EntrySet] = None,
+    *,
+    limit: Optional[int] = None,
+    order: Optional[List[int]] = None,
+    fuzzy: Optional[_FuzzyIndex] = None,
+) -> List[Tuple[str, float, Dict[str, Any]]]:
     """
     Score each KB entry vs 'text' and return sorted candidates:
-    [(intent, score, entry), ...] (descending).
+    [(intent, score, entry), ...] (descending; ties keep KB order).
+
+    With 'limit', only the top 'limit' are returned, and entries are visited
+    in 'order' (from _by_cap): once an entry's cap can't reach the current
+    limit-th score, neither can any after it, so the scan stops.
+    'fuzzy' scores the fuzzy fallback for all entries in one call, the first
+    time an entry needs it.
     """
     tnorm = _prep(text)
-    out: List[Tuple[str, float, Dict[str, Any]]] = []
-
-    for e in entries:
-        patt = e.get("patterns") or []
-        syns = e.get("synonyms") or []
+    out: List[Tuple[float, int, Dict[str, Any]]] = []
+    hits = entry_set.hits(tnorm) if entry_set is not None else None
+    ranked = bool(limit) and order is not None
+    top: List[float] = []  # min-heap of the best 'limit' scores so far
+    fuzzy_best: Optional[Dict[int, float]] = None
+
+    for i in (order if ranked else range(len(entries))):
+        e = entries[i]
+        compiled = e.get("_compiled")
+        if compiled is None:
+            compiled = e["_compiled"] = _compile_entry(e)
+            e["matched"] = _matched_label(e)
+        any_rx, pterms, sterms, fuzzy_norm, cap, plits, slits = compiled
+        # caps only shrink from here on; a tie could still outrank (earlier
+        # in the KB), so stop only when strictly below
+        if ranked and len(top) == limit and cap < top[0]:
+            break
+
+        if hits is not None and i in entry_set.covered:
+            may_hit = i in hits
+        else:
+            may_hit = any_rx is None or bool(any_rx.search(tnorm))
 
         score = 0.0
-        for p in patt:
-            score += _score_hit(tnorm, p)
-        for s in syns:
-            score += _score_hit(tnorm, s) * 0.6  # synonyms weigh less
+        if may_hit:
+            # with the top 'limit' full, a score below top[0] can't place
+            need = top[0] if ranked and len(top) == limit else None
+            score = _sum_terms(tnorm, pterms, sterms, cap, need)
+            if score is None:
+                continue
+        else:
+            # no regex term can hit; only substring-fallback terms still score
+            for t in plits:
+                score += _term_score(tnorm, t)
+            for t in slits:
+                score += _term_score(tnorm, t) * 0.6
 
         # Gentle fuzzy fallback only if nothing hit;
         # require very high similarity and dampen weight.
-        if score == 0.0 and patt:
-            best = 0.0
-            for p in patt[:3]:
-                best = max(best, _fuzzy(tnorm, p))
-            if best >= 0.92:
+        # (It scores at most 0.4, so skip it once that can't make the top.)
+        if score == 0.0 and fuzzy_norm and not (ranked and len(top) == limit and top[0] > 0.4):
+            if fuzzy is not None:
+                if fuzzy_best is None:
+                    fuzzy_best = fuzzy.best(tnorm)
+                best = fuzzy_best.get(i, 0.0)
+            else:
+                best = 0.0
+                for p in fuzzy_norm:
+                    best = max(best, _fuzzy(tnorm, p, FUZZY_MIN))
+            if best >= FUZZY_MIN:
                 score = best * 0.4
 
         if score > 0.0:
-            e["matched"] = ", ".join((patt[:2] + syns[:2])[:4])
-            out.append((e.get("intent") or "", float(score), e))
+            out.append((float(score), i, e))
+            if ranked:
+                if len(top) < limit:
+                    heapq.heappush(top, score)
+                elif score > top[0]:
+                    heapq.heapreplace(top, score)
 
-    out.sort(key=lambda x: x[1], reverse=True)
-    return out
+    out.sort(key=lambda x: (-x[0], x[1]))
+    return [(e.get("intent") or "", sc, e) for sc, _, e in out[:limit]]
 
 
 # ---------------------------------------------------------------------
@@ -122,10 +380,31 @@ def _render_answer(ans: Any, lang: str) -> str:
         return parts[0]
     return "\n".join(f"• {p}" for p in parts)
 
+# Answers are static between reloads, so render them once per language.
+_RENDER_LANGS = ("en", "my")
+
+def _rendered(e: Dict[str, Any], lang: str) -> str:
+    cache = e.get("_rendered")
+    if cache is not None and lang in cache:
+        return cache[lang]
+    return _render_answer(e.get("answers"), lang)
+
 
 # ---------------------------------------------------------------------
 # Rule Engine
 # ---------------------------------------------------------------------
+class _KB(NamedTuple):
+    """One loaded knowledge base with everything compiled from it."""
+    entries: List[Dict[str, Any]]
+    meta: Dict[str, Any]
+    entry_set: Optional[_EntrySet]
+    order: List[int]
+    fuzzy: Optional[_FuzzyIndex]
+    by_intent: Dict[str, Dict[str, Any]]
+    version: int
+    stamp: Optional[Tuple[int, int]]  # (mtime_ns, size) of the loaded file
+
+
 class RuleEngine:
     """
     Tiny matcher over knowledge.json.
@@ -142,29 +421,76 @@ class RuleEngine:
 
     def __init__(self, path: str = "data/knowledge.json"):
         self.path = path
-        self.entries: List[Dict[str, Any]] = []
-        self.meta: Dict[str, Any] = {}
+        self._kb = _KB([], {}, None, [], None, {}, 0, None)
         self.reload()
 
+    # The whole compiled KB lives in one _KB snapshot, replaced by a single
+    # attribute store on reload; every lookup reads self._kb once and uses
+    # only that snapshot, so it never mixes old entries with a new index.
+    @property
+    def entries(self) -> List[Dict[str, Any]]:
+        return self._kb.entries
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return self._kb.meta
+
+    @property
+    def version(self) -> int:
+        """Bumped on every reload; lets callers key caches on KB state."""
+        return self._kb.version
+
     # Public API -------------------------------------------------------
-    def reload(self) -> None:
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-read the KB if the file changed since the last load (or 'force').
+        Returns whether anything was reloaded; unchanged files cost one stat().
+        """
+        old = self._kb
         try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            st = os.stat(self.path)
+            stamp: Optional[Tuple[int, int]] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if not force and old.version and stamp == old.stamp:
+            return False
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read()
+            try:
+                data = orjson.loads(raw)
+            except orjson.JSONDecodeError:  # NaN/Infinity, >64-bit ints: stdlib accepts those
+                data = json.loads(raw)
         except Exception:
             data = {}
-        self.meta = data.get("meta", {})
-        self.entries = data.get("intents") or data.get("entries") or []
+        entries = data.get("intents") or data.get("entries") or []
+        for e in entries:
+            e["_compiled"] = _compile_entry(e)
+            e["_rendered"] = {lg: _render_answer(e.get("answers"), lg) for lg in _RENDER_LANGS}
+            e["matched"] = _matched_label(e)
+        by_intent: Dict[str, Dict[str, Any]] = {}
+        for e in entries:
+            if e.get("intent"):
+                by_intent.setdefault(e["intent"], e)  # first entry wins, as in a scan
+        self._kb = _KB(
+            entries, data.get("meta", {}), _EntrySet.build(entries), _by_cap(entries),
+            _FuzzyIndex.build(entries), by_intent, old.version + 1, stamp,
+        )
+        return True
+
+    def _rank(self, message: str, limit: int) -> List[Tuple[str, float, Dict[str, Any]]]:
+        kb = self._kb
+        return _candidates(
+            kb.entries, message, kb.entry_set, limit=limit, order=kb.order, fuzzy=kb.fuzzy,
+        )
 
     def answer_for(self, intent: str, lang: str = "en") -> str:
-        for e in self.entries:
-            if e.get("intent") == intent:
-                return _render_answer(e.get("answers"), lang)
-        return ""
+        e = self._kb.by_intent.get(intent)
+        return _rendered(e, lang) if e is not None else ""
 
     def trace(self, message: str, lang_hint: Optional[str] = None, top_k: int = 8) -> Dict[str, Any]:
         lang = detect_language(message, hint=lang_hint)
-        cands = _candidates(self.entries, message)
+        cands = self._rank(message, top_k)
         view = [{
             "intent": i,
             "score": round(s, 3),
@@ -176,14 +502,21 @@ class RuleEngine:
 
     def kb_context(self, message: str, lang_hint: Optional[str] = None, top_k: int = 5) -> List[str]:
         lang = detect_language(message, hint=lang_hint)
-        cands = _candidates(self.entries, message)
+        cands = self._rank(message, top_k)
         out: List[str] = []
         for _, _, entry in cands[:top_k]:
-            s = _render_answer(entry.get("answers"), lang)
+            s = _rendered(entry, lang)
             if s:
                 out.append(s)
         return out
 
+    def top_intent(self, message: str) -> Optional[str]:
+        """The intent match() would return (None below RULE_MIN_SCORE), without building the reply."""
+        cands = self._rank(message, 1)
+        if not cands or cands[0][1] < RULE_MIN_SCORE:
+            return None
+        return cands[0][0]
+
     def match(
         self,
         message: str,
@@ -204,7 +537,7 @@ class RuleEngine:
           }
         """
         lang = detect_language(message, hint=lang_hint)
-        cands = _candidates(self.entries, message)
+        cands = self._rank(message, 1)
         if not cands:
             return {"intent": None, "answer": "", "confidence": 0.0, "matched": "", "safety_notes": []}
 
@@ -222,7 +555,7 @@ class RuleEngine:
                 "safety_notes": [],
             }
 
-        answer = _render_answer(entry.get("answers"), lang)
+        answer = _rendered(entry, lang)
 
         flow = None
         esc = None
@@ -353,12 +686,90 @@ _SENSITIVE_ACCOUNT_MY = (
     "အကောင့်ဖွင့်", "အကောင့်ပိတ်", "ကန့်သတ် တိုး", "ကတ် PIN", "PIN ပြန်သတ်မှတ်",
 )
 
-def _any_regex(patterns: List[str], text: str) -> bool:
-    return any(re.search(p, text, flags=re.I) for p in patterns)
+def _regex_union(*groups: List[str]) -> "re.Pattern[str]":
+    """Compile pattern lists into one case-insensitive alternation (one scan per check)."""
+    return re.compile("|".join(f"(?:{p})" for g in groups for p in g), re.I)
+
+_DENY_RE = _regex_union(_DENY)
+_ALLOW_RE = _regex_union(
+    _BANKING_GENERAL_EN, _BANKING_GENERAL_MY,
+    _CHANNELS_EN, _CHANNELS_MY,
+    _SECURITY_EN, _SECURITY_MY,
+    _EMPLOYEE_EN, _EMPLOYEE_MY,
+    _CUSTOMER_EN, _CUSTOMER_MY,
+)
+_SOFT_ALLOW = [r"\b(help|hello|hi|what can you do|bank|security)\b"]
+_SOFT_ALLOW_RE = _regex_union(_SOFT_ALLOW)
+
+def _phrase_re(*phrases: str) -> "re.Pattern[str]":
+    """One literal alternation over casefolded phrases (longest first)."""
+    folded = sorted({ph.casefold() for ph in phrases}, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, folded)))
+
+_SENSITIVE_ACCOUNT_RE = _phrase_re(*_SENSITIVE_ACCOUNT_EN, *_SENSITIVE_ACCOUNT_MY)
+
+def _any_phrase(text: str, phrases: "re.Pattern[str]") -> bool:
+    return phrases.search(text.casefold()) is not None
+
+# re2's \s and \b are ASCII-only, so map the other characters re treats as
+# whitespace to " ", and the non-ASCII letters re.I equates with ASCII ones
+# (ı İ ſ K) to those letters. A re2 scan of the mapped text then finds every
+# pattern re would (a miss is final); a hit is confirmed with re.
+_RE2_FOLD = str.maketrans(
+    {c: " " for c in (0x0B, 0x1C, 0x1D, 0x1E, 0x1F, 0x85, 0xA0, 0x1680, *range(0x2000, 0x200B),
+                      0x2028, 0x2029, 0x202F, 0x205F, 0x3000)}
+    | {0x130: "i", 0x131: "i", 0x17F: "s", 0x212A: "k"}
+)
 
-def _any_phrase(text: str, phrases: tuple[str, ...]) -> bool:
-    t = text.casefold()
-    return any(ph.casefold() in t for ph in phrases)
+class _ScopeSet:
+    """
+    Every scope pattern in one re2.Set, so a single scan of the message names
+    the few patterns that can hit; only those are re-checked with re.
+    """
+    __slots__ = ("_set", "_ids")
+
+    def __init__(self, groups: Dict[str, List[str]]):
+        opts = _re2.Options()
+        opts.case_sensitive = False
+        self._set = _re2.Set.SearchSet(opts)
+        self._ids: Dict[int, Tuple[str, "re.Pattern[str]"]] = {}  # set index -> (category, pattern)
+        for cat, pats in groups.items():
+            for p in pats:
+                self._ids[self._set.Add(p)] = (cat, re.compile(p, re.I))
+        self._set.Compile()
+
+    def categories(self, text: str) -> set:
+        found = set()
+        for k in self._set.Match(text.translate(_RE2_FOLD)) or ():
+            cat, rx = self._ids[k]
+            if cat not in found and rx.search(text):
+                found.add(cat)
+        return found
+
+    @classmethod
+    def build(cls, groups: Dict[str, List[str]]) -> Optional["_ScopeSet"]:
+        if _re2 is None:
+            return None
+        try:
+            return cls(groups)
+        except Exception:  # a pattern re2 can't take: keep the re alternations
+            return None
+
+_SCOPE_SET = _ScopeSet.build({
+    "deny": _DENY,
+    "allow": [
+        *_BANKING_GENERAL_EN, *_BANKING_GENERAL_MY,
+        *_CHANNELS_EN, *_CHANNELS_MY,
+        *_SECURITY_EN, *_SECURITY_MY,
+        *_EMPLOYEE_EN, *_EMPLOYEE_MY,
+        *_CUSTOMER_EN, *_CUSTOMER_MY,
+    ],
+    "soft": _SOFT_ALLOW,
+})
+
+def _scope_hit(text: str, cats: Optional[set], cat: str, rx: "re.Pattern[str]") -> bool:
+    """Whether 'text' hits a scope category (from the re2 scan when there was one)."""
+    return cat in cats if cats is not None else rx.search(text) is not None
 
 
 def scope_check(user_text: str, *, rules: Optional["RuleEngine"] = None) -> Tuple[bool, str, str, str]:
@@ -374,30 +785,25 @@ def scope_check(user_text: str, *, rules: Optional["RuleEngine"] = None) -> Tupl
 
     # 1) KB direct match → in scope
     if rules is not None:
-        m = rules.match(t, lang_hint=lang)
-        if m and m.get("intent"):
-            if m["intent"] == "personal_account_scope":
+        intent = rules.top_intent(t)
+        if intent:
+            if intent == "personal_account_scope":
                 return True, lang, "matched_knowledge_sensitive", "sensitive"
             return True, lang, "matched_knowledge", "normal"
 
+    cats = _SCOPE_SET.categories(t) if _SCOPE_SET is not None else None
+
     # 2) Hard deny unrelated topics
-    if _any_regex(_DENY, t):
+    if _scope_hit(t, cats, "deny", _DENY_RE):
         return False, lang, "denylist", "deny"
 
     # 3) Broad allow across BANKING + CYBERSEC
-    allow = (
-        _any_regex(_BANKING_GENERAL_EN, t) or _any_regex(_BANKING_GENERAL_MY, t) or
-        _any_regex(_CHANNELS_EN, t) or _any_regex(_CHANNELS_MY, t) or
-        _any_regex(_SECURITY_EN, t) or _any_regex(_SECURITY_MY, t) or
-        _any_regex(_EMPLOYEE_EN, t) or _any_regex(_EMPLOYEE_MY, t) or
-        _any_regex(_CUSTOMER_EN, t) or _any_regex(_CUSTOMER_MY, t)
-    )
-    if allow:
-        tag = "sensitive" if (_any_phrase(t, _SENSITIVE_ACCOUNT_EN) or _any_phrase(t, _SENSITIVE_ACCOUNT_MY)) else "normal"
+    if _scope_hit(t, cats, "allow", _ALLOW_RE):
+        tag = "sensitive" if _any_phrase(t, _SENSITIVE_ACCOUNT_RE) else "normal"
         return True, lang, "broad_allow", tag
 
     # 4) Soft allow for general banking/security queries & greetings
-    if re.search(r"\b(help|hello|hi|what can you do|bank|security)\b", t, flags=re.I) or ("ဘဏ်" in t):
+    if _scope_hit(t, cats, "soft", _SOFT_ALLOW_RE) or ("ဘဏ်" in t):
         return True, lang, "soft_allow", "normal"
 
     # 5) Otherwise, out of scope
@@ -3,17 +3,29 @@ import os
 import time
 import logging
 import shutil
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import JSONResponse
 
+from app.utils.logger import start_log_writer, stop_log_writer
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("uvicorn.error")
 
 APP_VERSION = os.getenv("API_VERSION", "2.0.0")
 
-app = FastAPI(title="Pyit Tine Htaung API", version=APP_VERSION)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_log_writer()
+    try:
+        yield
+    finally:
+        upload.shutdown_ocr_pool()
+        await stop_log_writer()
+
+app = FastAPI(title="Pyit Tine Htaung API", version=APP_VERSION, lifespan=lifespan)
 
 # --- CORS: Netlify prod + local dev + Netlify previews ---
 app.add_middleware(
@@ -33,10 +33,17 @@ def detect_language(text: str, hint: str | None = None) -> str:
     """
     if hint in {"en", "my"}:
         return hint
-    if not text:
+    if not text or text.isascii():
         return "en"
     return "my" if _MY_RANGE.search(text) else "en"
 
+_PUNCT_TABLE = str.maketrans({
+    "“": '"', "”": '"', "‘": "'", "’": "'",
+    "—": "-", "–": "-", "…": "...",
+    "။": " ", "၊": " ",
+})
+_WS_RE = re.compile(r"\s+")
+
 def normalize(text: str) -> str:
     """
     Normalize inputs so rule matching becomes easier and consistent.
@@ -55,16 +62,11 @@ def normalize(text: str) -> str:
     s = ud.normalize("NFKC", text)
 
     # 2) Smart punctuation → ASCII, 3) Myanmar punctuation → spaces
-    table = str.maketrans({
-        "“": '"', "”": '"', "‘": "'", "’": "'",
-        "—": "-", "–": "-", "…": "...",
-        "။": " ", "၊": " ",
-    })
-    s = s.translate(table)
+    s = s.translate(_PUNCT_TABLE)
 
     # 4) Lowercase (does not affect Myanmar script)
     s = s.lower()
 
     # 5) Collapse whitespace
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _WS_RE.sub(" ", s).strip()
     return s
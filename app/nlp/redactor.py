@@ -1,6 +1,9 @@
 import regex as re
+from functools import lru_cache
 
 DIGITS = re.compile(r"\d")
+CARD_RE = re.compile(r"\b(?:\d[ -]?){12,19}\b")
+LONG_NUM_RE = re.compile(r"\b\d{7,}\b")
 
 def luhn_check(number: str) -> bool:
     s = ''.join(ch for ch in number if ch.isdigit())
@@ -15,17 +18,30 @@ def luhn_check(number: str) -> bool:
         total += d
     return total % 10 == 0
 
+# Bot replies and common user messages repeat; memoize short inputs only.
+REDACT_CACHE_MAX_LEN = 1024
+
 def redact(text: str) -> str:
+    # every rule below needs a digit; most replies have none
+    if not DIGITS.search(text):
+        return text
+    if len(text) < REDACT_CACHE_MAX_LEN:
+        return _redact_cached(text)
+    return _redact(text)
+
+@lru_cache(maxsize=2048)
+def _redact_cached(text: str) -> str:
+    return _redact(text)
+
+def _redact(text: str) -> str:
     # Card numbers (Luhn)
     def repl_card(m):
         raw = m.group(0)
         digits = ''.join(ch for ch in raw if ch.isdigit())
         return "[REDACTED-CARD-{}digits]".format(len(digits))
 
-    text = re.sub(r"\b(?:\d[ -]?){12,19}\b", 
-                  lambda m: repl_card(m) if luhn_check(m.group(0)) else m.group(0),
-                  text)
+    text = CARD_RE.sub(lambda m: repl_card(m) if luhn_check(m.group(0)) else m.group(0), text)
 
     # Account/phone sequences (general)
-    text = re.sub(r"\b\d{7,}\b", "[REDACTED-NUM]", text)
+    text = LONG_NUM_RE.sub("[REDACTED-NUM]", text)
     return text
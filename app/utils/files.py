@@ -1 +1,9 @@
-# Placeholder for future file-handling (e.g., PDF text extraction if you add it)
\ No newline at end of file
+# File-handling helpers (e.g., OCR; PDF text extraction if you add it).
+# Kept free of app imports: OCR worker processes are spawned and import only
+# this module, not the routers and their engines.
+import io
+
+def ocr_bytes(data: bytes) -> str:
+    import pytesseract  # type: ignore
+    from PIL import Image  # type: ignore
+    return pytesseract.image_to_string(Image.open(io.BytesIO(data)))
@@ -1,22 +1,34 @@
 from __future__ import annotations
+import asyncio
 import json
 from pathlib import Path
 from datetime import datetime, timezone
 from threading import Lock
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+import orjson
 
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 JSONL_PATH = LOG_DIR / "requests.jsonl"
 
+# Background writer: events are queued on the event loop and appended in
+# batches off-thread. When the writer isn't running (scripts, tests without
+# lifespan) log_event falls back to a synchronous append.
+QUEUE_MAX = 10_000
+BATCH_MAX = 256
+
 _lock = Lock()
+_queue: Optional[asyncio.Queue] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_task: Optional[asyncio.Task] = None
 
-def _to_jsonable(v: Any) -> Any:
+def _dumps_line(rec: Dict[str, Any]) -> bytes:
+    # values orjson can't encode natively are logged as str()
     try:
-        json.dumps(v, ensure_ascii=False)
-        return v
-    except Exception:
-        return str(v)
+        return orjson.dumps(rec, default=str, option=orjson.OPT_APPEND_NEWLINE)
+    except TypeError:  # e.g. ints beyond 64 bits
+        return (json.dumps(rec, ensure_ascii=False, default=str) + "\n").encode("utf-8")
 
 def log_event(event_type: str, **fields: Any) -> None:
     """
@@ -25,12 +37,68 @@ def log_event(event_type: str, **fields: Any) -> None:
     NOTE: make sure caller redacts secrets before logging.
     """
     rec: Dict[str, Any] = {"ts": datetime.now(timezone.utc).isoformat(), "type": event_type}
-    rec.update({k: _to_jsonable(v) for (k, v) in fields.items()})
-    line = json.dumps(rec, ensure_ascii=False)
+    rec.update(fields)
+    line = _dumps_line(rec)
+    if _queue is not None and _on_writer_loop():
+        try:
+            _queue.put_nowait(line)
+        except asyncio.QueueFull:
+            pass  # drop under overload rather than block the request
+        return
+    _write_lines([line])
+
+def _on_writer_loop() -> bool:
+    try:
+        return asyncio.get_running_loop() is _loop
+    except RuntimeError:
+        return False
+
+def _write_lines(lines: List[bytes]) -> None:
     with _lock:
         JSONL_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with JSONL_PATH.open("a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        with JSONL_PATH.open("ab") as f:
+            f.write(b"".join(lines))
+
+async def _drain(q: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await q.get()]
+        while len(batch) < BATCH_MAX:
+            try:
+                batch.append(q.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            await loop.run_in_executor(None, _write_lines, batch)
+        except Exception:
+            pass
+
+def start_log_writer() -> None:
+    """Start the background JSONL writer on the running event loop."""
+    global _queue, _loop, _task
+    if _task is not None:
+        return
+    _loop = asyncio.get_running_loop()
+    _queue = asyncio.Queue(maxsize=QUEUE_MAX)
+    _task = _loop.create_task(_drain(_queue))
+
+async def stop_log_writer() -> None:
+    """Stop the writer and flush whatever is still queued."""
+    global _queue, _loop, _task
+    q, task = _queue, _task
+    _queue, _loop, _task = None, None, None
+    if task is None or q is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    rest: List[bytes] = []
+    while not q.empty():
+        rest.append(q.get_nowait())
+    if rest:
+        _write_lines(rest)
 
 def tail_jsonl(n: int = 200) -> List[Dict[str, Any]]:
     if not JSONL_PATH.exists():
@@ -44,7 +112,7 @@ def tail_jsonl(n: int = 200) -> List[Dict[str, Any]]:
         if not ln:
             continue
         try:
-            out.append(json.loads(ln))
+            out.append(orjson.loads(ln))
         except Exception:
             continue
     return out
\ No newline at end of file